@@ -26,8 +26,10 @@ import base64
 import sqlite3
 import hashlib
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 
 from flask import (
     Flask, request, jsonify, send_file, session,
@@ -44,6 +46,25 @@ app.secret_key = os.environ.get("SECRET_KEY", secrets.token_hex(32))
 
 # Gemini API Key (pode ser configurada por env ou pelo usuário na interface)
 GEMINI_API_KEY_GLOBAL = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_HOST = "https://generativelanguage.googleapis.com"
+
+# Sessão HTTP reaproveitada entre chamadas ao Gemini (keep-alive).
+# Criada por processo: sockets não podem ser compartilhados após o fork.
+_sessao_gemini = None
+_sessao_gemini_pid = None
+_sessao_gemini_lock = threading.Lock()
+
+
+def obter_sessao_gemini():
+    """Retorna a sessão HTTP do Gemini deste processo, criando se preciso."""
+    global _sessao_gemini, _sessao_gemini_pid
+    if _sessao_gemini is not None and _sessao_gemini_pid == os.getpid():
+        return _sessao_gemini
+    with _sessao_gemini_lock:
+        if _sessao_gemini is None or _sessao_gemini_pid != os.getpid():
+            _sessao_gemini = http_requests.Session()
+            _sessao_gemini_pid = os.getpid()
+        return _sessao_gemini
 
 # =================================================================
 # BANCO DE DADOS (SQLite)
@@ -123,6 +144,42 @@ def login_required(f):
     return decorated
 
 
+# =================================================================
+# AQUECIMENTO: ESTADO E MEDIÇÃO (worker frio vs. aquecido)
+# =================================================================
+_aquecimento = {
+    "pid": None,
+    "pronto": False,
+    "aquecimento_ms": None,
+    "primeira_requisicao": {},
+}
+_aquecimento_lock = threading.Lock()
+
+
+def medir_primeira_requisicao(f):
+    """
+    Decorator: registra a latência da 1ª chamada bem-sucedida desta rota
+    no worker. Respostas de erro (ex.: sem chave do Gemini) não contam.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.path in _aquecimento["primeira_requisicao"]:
+            return f(*args, **kwargs)
+        iniciar_aquecimento()
+        aquecido = _aquecimento["pronto"]
+        inicio = time.perf_counter()
+        resposta = app.make_response(f(*args, **kwargs))
+        ms = round((time.perf_counter() - inicio) * 1000, 1)
+        if resposta.status_code >= 400:
+            return resposta
+        _aquecimento["primeira_requisicao"].setdefault(
+            request.path, {"ms": ms, "aquecido": aquecido})
+        app.logger.info("Primeira chamada de %s no worker %s: %.1f ms (aquecido=%s)",
+                        request.path, os.getpid(), ms, aquecido)
+        return resposta
+    return decorated
+
+
 # =================================================================
 # ROTAS DE AUTENTICAÇÃO
 # =================================================================
@@ -261,6 +318,7 @@ def salvar_config():
 # =================================================================
 @app.route("/api/perguntar", methods=["POST"])
 @login_required
+@medir_primeira_requisicao
 def perguntar():
     """
     Endpoint principal: recebe pergunta (texto e/ou imagem) e retorna
@@ -398,10 +456,10 @@ Responda APENAS com o JSON válido, sem nenhum texto antes ou depois."""
             }
         })
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
+    url = f"{GEMINI_HOST}/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
 
     try:
-        resp = http_requests.post(url, json={
+        resp = obter_sessao_gemini().post(url, json={
             "contents": [{"parts": parts}],
             "generationConfig": {"temperature": 0.7, "maxOutputTokens": 4000}
         }, timeout=30)
@@ -501,10 +559,16 @@ COR_TEXTO = (255, 255, 255)
 COR_DESTAQUE = (255, 255, 100)
 COR_TITULO = (173, 216, 230)
 BORDA = 20
+FONTE_TITULO = 28
+FONTE_CONTA = 52
+FONTE_TEXTO = 20
+FONTE_DICA = 16
 SIMBOLOS = {"soma": "+", "subtração": "−", "multiplicação": "×", "divisão": "÷"}
 
 
+@lru_cache(maxsize=None)
 def obter_fonte(tamanho):
+    """Carrega a fonte uma única vez por tamanho (cache em memória)."""
     for caminho in [
         "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
         "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
@@ -536,6 +600,7 @@ def desenhar_bolinhas(draw, quantidade, x_inicio, y_inicio, grupos=1, cor=COR_DE
 
 @app.route("/api/lousa", methods=["POST"])
 @login_required
+@medir_primeira_requisicao
 def gerar_lousa():
     """Gera imagem PNG da lousa com a conta."""
     dados = request.get_json()
@@ -550,10 +615,10 @@ def gerar_lousa():
     draw.rectangle([0, 0, LARGURA - 1, ALTURA - 1], outline=COR_BORDA, width=BORDA)
     draw.rectangle([BORDA, BORDA, LARGURA - BORDA - 1, ALTURA - BORDA - 1], outline=(60, 90, 60), width=2)
 
-    f_titulo = obter_fonte(28)
-    f_conta = obter_fonte(52)
-    f_texto = obter_fonte(20)
-    f_dica = obter_fonte(16)
+    f_titulo = obter_fonte(FONTE_TITULO)
+    f_conta = obter_fonte(FONTE_CONTA)
+    f_texto = obter_fonte(FONTE_TEXTO)
+    f_dica = obter_fonte(FONTE_DICA)
     y = BORDA + 30
 
     # Título
@@ -640,11 +705,88 @@ def health():
     return jsonify({"status": "ok", "service": "Professor IA"})
 
 
+# =================================================================
+# AQUECIMENTO (WARM-UP) DOS WORKERS
+# =================================================================
+def carregar_recursos():
+    """
+    Carrega o que pode ser compartilhado entre workers: fontes da lousa
+    e inicialização dos plugins do Pillow. Seguro para rodar no master
+    (preload_app) antes do fork.
+    """
+    for tamanho in (FONTE_TITULO, FONTE_CONTA, FONTE_TEXTO, FONTE_DICA):
+        obter_fonte(tamanho)
+    Image.init()
+    # Render mínimo para deixar o encoder PNG pronto
+    img = Image.new("RGB", (1, 1), COR_FUNDO)
+    ImageDraw.Draw(img).text((0, 0), "0", font=obter_fonte(FONTE_DICA))
+    img.save(io.BytesIO(), format="PNG")
+
+
+def aquecer_worker():
+    """
+    Aquece o processo atual (rodar APÓS o fork): toca o arquivo do banco
+    uma vez (a conexão é fechada em seguida; cada requisição abre a sua) e
+    pré-estabelece a conexão TLS com o Gemini na sessão do worker.
+    Falhas não impedem o worker de ficar pronto — só deixam a 1ª chamada
+    mais lenta.
+    """
+    inicio = time.perf_counter()
+    try:
+        carregar_recursos()
+
+        try:
+            conn = get_db()
+            conn.execute("SELECT 1 FROM usuarios LIMIT 1").fetchall()
+            conn.close()
+        except sqlite3.Error as e:
+            app.logger.warning("Aquecimento: não foi possível abrir o banco: %s", e)
+
+        try:
+            obter_sessao_gemini().head(GEMINI_HOST, timeout=5)
+        except http_requests.exceptions.RequestException as e:
+            app.logger.warning("Aquecimento: não foi possível conectar ao Gemini: %s", e)
+    except Exception:
+        app.logger.exception("Aquecimento: erro inesperado")
+    finally:
+        _aquecimento["aquecimento_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        _aquecimento["pronto"] = True
+
+
+def iniciar_aquecimento():
+    """
+    Dispara aquecer_worker() em segundo plano, uma vez por processo.
+    O worker atende requisições desde já; /api/ready passa a 200 ao fim.
+    """
+    if _aquecimento["pid"] == os.getpid():
+        return
+    with _aquecimento_lock:
+        if _aquecimento["pid"] == os.getpid():
+            return
+        _aquecimento.update(pid=os.getpid(), pronto=False, aquecimento_ms=None,
+                            primeira_requisicao={})
+        threading.Thread(target=aquecer_worker, name="aquecimento", daemon=True).start()
+
+
+@app.route("/api/ready")
+def ready():
+    """Readiness: 503 enquanto o worker aquece, 200 quando terminou."""
+    iniciar_aquecimento()
+    pronto = _aquecimento["pronto"]
+    return jsonify({
+        "pronto": pronto,
+        "pid": os.getpid(),
+        "aquecimento_ms": _aquecimento["aquecimento_ms"],
+        "primeira_requisicao": _aquecimento["primeira_requisicao"],
+    }), 200 if pronto else 503
+
+
 # =================================================================
 # INICIALIZAÇÃO
 # =================================================================
 if __name__ == "__main__":
     init_db()
+    iniciar_aquecimento()
     port = int(os.environ.get("PORT", 5000))
     debug = os.environ.get("FLASK_DEBUG", "false").lower() == "true"
     print("=" * 50)
@@ -5,8 +5,19 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 workers = 2
 timeout = 120
 
+# Importa o app (Flask, Pillow, requests) e carrega as fontes no master,
+# uma única vez; os workers herdam tudo já pronto via fork.
+preload_app = True
+
 
 def on_starting(server):
     """Inicializa o banco de dados ao iniciar o servidor."""
-    from app import init_db
+    from app import init_db, carregar_recursos
     init_db()
+    carregar_recursos()
+
+
+def post_worker_init(worker):
+    """Dispara o aquecimento do worker (banco e conexão com o Gemini) em segundo plano."""
+    from app import iniciar_aquecimento
+    iniciar_aquecimento()